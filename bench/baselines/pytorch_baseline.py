@@ -10,10 +10,12 @@ import os
 import sys
 import json
 import time
+import ctypes
+import ctypes.util
 import argparse
+import functools
 from pathlib import Path
 from typing import Dict, List, Optional
-import statistics
 
 import numpy as np
 
@@ -31,75 +33,441 @@ except ImportError:
     print("ERROR: PyArrow not installed")
     sys.exit(1)
 
+sys.path.insert(0, str(Path(__file__).parents[1]))
+from bench_utils import ProgressReporter, advise_readahead, latency_percentiles
+
+
+# Columns that never contribute features
+EXCLUDED_COLUMNS = frozenset({'id', 'label', 'blob', 'image_data'})
+
+# Feature dtypes written by generate_datasets.py --dtype, mapped to the
+# torch dtype batches are served in and the numpy dtype holding their bits
+FEATURE_DTYPES = {
+    'float32': (torch.float32, np.float32),
+    'bfloat16': (torch.bfloat16, np.int16),
+    'uint8': (torch.uint8, np.uint8),
+}
+
+def _numeric_columns(schema: pa.Schema) -> List[str]:
+    """Names of integer/floating feature columns in a schema."""
+    return [
+        field.name for field in schema
+        if field.name not in EXCLUDED_COLUMNS
+        and (pa.types.is_integer(field.type) or pa.types.is_floating(field.type))
+    ]
+
+
+def _read_columns(schema: pa.Schema) -> Optional[List[str]]:
+    """Feature and label columns to read, or None to read everything."""
+    columns = _numeric_columns(schema)
+    if 'label' in schema.names:
+        columns.append('label')
+    
+    return columns or None
+
+
+def _feature_dtype(schema: pa.Schema) -> str:
+    """Feature dtype recorded in a generated dataset's schema metadata."""
+    metadata = schema.metadata or {}
+    return metadata.get(b'zenith.feature_dtype', b'float32').decode()
+
+
+def _feature_matrix(data, numeric_cols: List[str], feature_dtype: str) -> np.ndarray:
+    """
+    Stack the feature columns of a Table or RecordBatch into an (N, F) array.
+    
+    Features stay in their storage dtype, so uint8 and bfloat16 datasets
+    move 4x and 2x fewer bytes than float32 on the way to the GPU. bfloat16
+    bits are returned as int16, to be viewed as torch.bfloat16.
+    """
+    storage = FEATURE_DTYPES[feature_dtype][1]
+    if not numeric_cols:
+        return np.zeros((data.num_rows, 10), dtype=storage)
+    
+    features = np.stack(
+        [data.column(col).to_numpy() for col in numeric_cols],
+        axis=1,
+    )
+    if feature_dtype == 'bfloat16':
+        return features.view(np.int16)
+    
+    return features.astype(storage, copy=False)
+
+
+def _label_array(data, num_rows: int) -> np.ndarray:
+    """
+    Read the label column of a Table or RecordBatch as a writable int64 array.
+    
+    Falls back to all-zero labels when the dataset has no label column.
+    """
+    if 'label' not in data.column_names:
+        return np.zeros(num_rows, dtype=np.int64)
+    
+    labels = data.column('label').to_numpy(zero_copy_only=False)
+    
+    # Copies only if Arrow handed back a read-only or non-int64 view
+    return np.require(labels, dtype=np.int64, requirements='W')
+
 
 class ParquetDataset(Dataset):
     """Map-style dataset for Parquet files."""
     
     def __init__(self, path: str):
-        self.table = pq.read_table(path)
-        self.num_rows = self.table.num_rows
+        # Only feature and label columns are read, so binary payloads are
+        # never decoded
+        schema = pq.read_schema(path, memory_map=True)
+        self.numeric_cols = _numeric_columns(schema)
+        self.feature_dtype = FEATURE_DTYPES[_feature_dtype(schema)][0]
+        
+        table = pq.read_table(
+            path,
+            columns=_read_columns(schema),
+            use_threads=True,
+            pre_buffer=True,
+            memory_map=True,
+        )
+        self.num_rows = table.num_rows
+        
+        # Materialize features once as a contiguous (N, F) matrix so that
+        # __getitem__ is a single C-level slice instead of per-column boxing
+        self.X = _feature_matrix(table, self.numeric_cols, _feature_dtype(schema))
+        
+        self.y = _label_array(table, self.num_rows)
+        
+        # The Arrow table is no longer needed once features are extracted
+        del table
+        
+        # Pinned buffer pool batches are gathered into; only set when the
+        # dataset is read in the main process
+        self.pool: Optional["PinnedBufferPool"] = None
         
     def __len__(self):
         return self.num_rows
     
     def __getitem__(self, idx):
-        row = {
-            col: self.table.column(col)[idx].as_py()
-            for col in self.table.column_names
-            if col not in ['blob', 'image_data']  # Skip binary for speed
-        }
+        x = torch.from_numpy(self.X[idx]).view(self.feature_dtype)
+        y = torch.from_numpy(np.asarray(self.y[idx]))
         
-        # Convert to tensor
-        features = []
-        label = row.get('label', 0)
+        return x, y
+    
+    def __getitems__(self, indices):
+        """
+        Fetch a whole batch with one gather per array.
         
-        for key, val in row.items():
-            if key not in ['id', 'label'] and isinstance(val, (int, float)):
-                features.append(float(val))
+        The DataLoader calls this instead of __getitem__ per index, so each
+        worker hands back two contiguous tensors rather than B small ones.
+        With a pool, rows are gathered straight into a pinned slot.
+        """
+        if self.pool is not None:
+            idx = torch.as_tensor(indices)
+            x, y = self.pool.acquire(len(idx))
+            X = torch.from_numpy(self.X).view(self.feature_dtype)
+            torch.index_select(X, 0, idx, out=x)
+            torch.index_select(torch.from_numpy(self.y), 0, idx, out=y)
+            return x, y
         
-        if features:
-            x = torch.tensor(features, dtype=torch.float32)
-        else:
-            x = torch.zeros(10)
+        idx = np.asarray(indices)
         
-        y = torch.tensor(label, dtype=torch.long)
+        x = torch.from_numpy(self.X[idx]).view(self.feature_dtype)
         
-        return x, y
+        return x, torch.from_numpy(self.y[idx])
+
+
+class ArrayBatchLoader:
+    """
+    Iterate shuffled batches straight out of a ParquetDataset's arrays.
+    
+    Bypasses the DataLoader sampler/fetcher/collate stack: each epoch draws
+    one permutation and every batch is a single index_select per array,
+    gathered into pinned pool buffers when a pool is given.
+    """
+    
+    def __init__(
+        self,
+        dataset: ParquetDataset,
+        batch_size: int,
+        pool: Optional["PinnedBufferPool"] = None,
+    ):
+        self.X = torch.from_numpy(dataset.X).view(dataset.feature_dtype)
+        self.y = torch.from_numpy(dataset.y)
+        self.batch_size = batch_size
+        self.pool = pool
+    
+    def __len__(self):
+        return (len(self.X) + self.batch_size - 1) // self.batch_size
+    
+    def __iter__(self):
+        perm = torch.from_numpy(np.random.permutation(len(self.X)))
+        
+        for start in range(0, len(perm), self.batch_size):
+            idx = perm[start:start + self.batch_size]
+            
+            if self.pool is not None:
+                x, y = self.pool.acquire(len(idx))
+                torch.index_select(self.X, 0, idx, out=x)
+                torch.index_select(self.y, 0, idx, out=y)
+            else:
+                x = self.X.index_select(0, idx)
+                y = self.y.index_select(0, idx)
+            
+            yield x, y
+
+
+def _l2_cache_bytes() -> int:
+    """Per-core L2 cache size in bytes (256 KiB if unknown)."""
+    try:
+        size = os.sysconf('SC_LEVEL2_CACHE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        size = 0
+    
+    return size if size > 0 else 262144
 
 
 class ParquetIterableDataset(IterableDataset):
     """Iterable dataset for streaming Parquet files."""
     
-    def __init__(self, path: str, batch_size: int = 1000):
+    def __init__(self, path: str, batch_size: Optional[int] = None):
         self.path = path
+        # Arrow read batch size; None sizes it so a batch of all numeric
+        # columns (rows x features x itemsize) fits in L2
         self.batch_size = batch_size
         
+        schema = pq.read_schema(path)
+        self.numeric_cols = _numeric_columns(schema)
+        self._read_cols = _read_columns(schema)
+        self._storage_dtype = _feature_dtype(schema)
+        self.feature_dtype = FEATURE_DTYPES[self._storage_dtype][0]
+        
     def __iter__(self):
         pf = pq.ParquetFile(self.path)
         
-        for batch in pf.iter_batches(batch_size=self.batch_size):
+        row_bytes = max(len(self.numeric_cols), 1) * self.feature_dtype.itemsize
+        rows_per_batch = self.batch_size or max(1024, _l2_cache_bytes() // row_bytes)
+        
+        for batch in pf.iter_batches(batch_size=rows_per_batch, columns=self._read_cols):
+            features = _feature_matrix(batch, self.numeric_cols, self._storage_dtype)
+            
+            x = torch.from_numpy(features).view(self.feature_dtype)
+            y = torch.from_numpy(_label_array(batch, batch.num_rows))
+            
             for i in range(batch.num_rows):
-                row = {
-                    col: batch.column(col)[i].as_py()
-                    for col in batch.schema.names
-                    if col not in ['blob', 'image_data']
-                }
-                
-                features = []
-                label = row.get('label', 0)
-                
-                for key, val in row.items():
-                    if key not in ['id', 'label'] and isinstance(val, (int, float)):
-                        features.append(float(val))
-                
-                if features:
-                    x = torch.tensor(features, dtype=torch.float32)
-                else:
-                    x = torch.zeros(10)
-                
-                y = torch.tensor(label, dtype=torch.long)
-                
-                yield x, y
+                yield x[i], y[i]
+
+
+def fast_collate(batch, pool: Optional["PinnedBufferPool"] = None):
+    """
+    Collate (x, y) samples into preallocated batch tensors.
+    
+    Allocates one (B, F) feature tensor and one (B,) label tensor up front
+    and stacks the samples directly into them, skipping the default collate's
+    type dispatch and intermediate allocations. When a pool is given, the
+    destination tensors are rented from it instead of freshly allocated.
+    
+    A tuple is treated as an (x, y) batch already gathered by the dataset's
+    __getitems__ and is passed through (or staged into the pool).
+    """
+    if isinstance(batch, tuple):
+        return batch if pool is None else pool.stage(batch)
+    
+    batch_len = len(batch)
+    first_x = batch[0][0]
+    
+    if pool is not None:
+        x, y = pool.acquire(batch_len)
+    else:
+        x = torch.empty((batch_len,) + tuple(first_x.shape), dtype=first_x.dtype)
+        y = torch.empty(batch_len, dtype=torch.long)
+    
+    torch.stack([sample[0] for sample in batch], out=x)
+    torch.stack([sample[1] for sample in batch], out=y)
+    
+    return x, y
+
+
+class CudaPrefetcher:
+    """
+    Overlap host-to-device copies with batch fetching.
+    
+    While the caller consumes batch N on the current stream, the copy of
+    batch N+1 is already issued on a side stream. With a pool, host batches
+    live in (or are staged into) pinned pool buffers, and each buffer is
+    handed back once the copy reading it has completed.
+    """
+    
+    def __init__(
+        self,
+        loader,
+        pool: Optional["PinnedBufferPool"] = None,
+        stage: bool = False,
+    ):
+        self.loader = iter(loader)
+        self.pool = pool
+        self.stage = stage
+        self.stream = torch.cuda.Stream()
+        self._preload()
+    
+    def _preload(self):
+        try:
+            self.next = next(self.loader)
+        except StopIteration:
+            self.next = None
+            return
+        
+        if self.pool is not None and self.stage:
+            self.next = self.pool.stage(self.next)
+        
+        with torch.cuda.stream(self.stream):
+            x, y = self.next
+            self.next = (x.cuda(non_blocking=True), y.cuda(non_blocking=True))
+            
+            if self.pool is not None:
+                self.pool.release(self.stream)
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        torch.cuda.current_stream().wait_stream(self.stream)
+        
+        current = self.next
+        if current is None:
+            raise StopIteration
+        
+        # Keep the side-stream allocations alive until the consumer is done
+        current[0].record_stream(torch.cuda.current_stream())
+        current[1].record_stream(torch.cuda.current_stream())
+        
+        self._preload()
+        return current
+
+
+def _gpu_numa_node(device: int = 0) -> int:
+    """Return the NUMA node closest to a GPU, or -1 if unknown."""
+    try:
+        props = torch.cuda.get_device_properties(device)
+        pci_addr = (
+            f"{props.pci_domain_id:04x}:{props.pci_bus_id:02x}:"
+            f"{props.pci_device_id:02x}.0"
+        )
+        with open(f"/sys/bus/pci/devices/{pci_addr}/numa_node") as f:
+            return int(f.read().strip())
+    except (AttributeError, OSError, ValueError):
+        return -1
+
+
+def _load_libnuma() -> Optional[ctypes.CDLL]:
+    """Load libnuma via ctypes, or return None if it is unavailable."""
+    lib_name = ctypes.util.find_library("numa")
+    if lib_name is None:
+        return None
+    
+    try:
+        lib = ctypes.CDLL(lib_name)
+    except OSError:
+        return None
+    
+    lib.numa_available.restype = ctypes.c_int
+    if lib.numa_available() < 0:
+        return None
+    
+    lib.numa_alloc_onnode.argtypes = [ctypes.c_size_t, ctypes.c_int]
+    lib.numa_alloc_onnode.restype = ctypes.c_void_p
+    lib.numa_free.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    lib.numa_free.restype = None
+    
+    return lib
+
+
+class PinnedBufferPool:
+    """
+    Ring of reusable pinned host buffers for batch staging.
+    
+    Buffers are allocated with libnuma on the NUMA node closest to the GPU
+    and registered with cudaHostRegister. Without libnuma (or a known node)
+    they come from PyTorch's pinned allocator instead. A slot is only handed
+    out again once the H2D copy that last read it has finished.
+    """
+    
+    def __init__(
+        self,
+        num_slots: int,
+        batch_size: int,
+        num_features: int,
+        device: int = 0,
+        numa_aware: bool = True,
+        feature_dtype: torch.dtype = torch.float32,
+    ):
+        self.numa_node = _gpu_numa_node(device) if numa_aware else -1
+        self._libnuma = _load_libnuma() if self.numa_node >= 0 else None
+        self._registered = []
+        
+        self.slots = [
+            (
+                self._alloc((batch_size, num_features), feature_dtype),
+                self._alloc((batch_size,), torch.long),
+            )
+            for _ in range(num_slots)
+        ]
+        self.events: List[Optional[torch.cuda.Event]] = [None] * num_slots
+        self._next_slot = 0
+        self._current_slot = 0
+    
+    def _alloc(self, shape: tuple, dtype: torch.dtype) -> torch.Tensor:
+        """Allocate one pinned buffer, NUMA-local when possible."""
+        numel = int(np.prod(shape))
+        nbytes = numel * torch.empty((), dtype=dtype).element_size()
+        
+        if self._libnuma is not None:
+            ptr = self._libnuma.numa_alloc_onnode(nbytes, self.numa_node)
+            if ptr:
+                err = torch.cuda.cudart().cudaHostRegister(ptr, nbytes, 0)
+                if int(err) == 0:
+                    self._registered.append((ptr, nbytes))
+                    raw = (ctypes.c_uint8 * nbytes).from_address(ptr)
+                    buf = torch.from_numpy(np.frombuffer(raw, dtype=np.uint8))
+                    return buf.view(dtype).view(shape)
+                self._libnuma.numa_free(ptr, nbytes)
+        
+        return torch.empty(shape, dtype=dtype, pin_memory=True)
+    
+    def acquire(self, batch_len: int):
+        """Rent the next (x, y) buffer pair, sliced to batch_len rows."""
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % len(self.slots)
+        
+        event = self.events[slot]
+        if event is not None:
+            event.synchronize()
+        
+        self._current_slot = slot
+        x, y = self.slots[slot]
+        return x[:batch_len], y[:batch_len]
+    
+    def stage(self, batch):
+        """Copy a host (x, y) batch into the next pinned buffer pair."""
+        x, y = batch
+        dst_x, dst_y = self.acquire(x.shape[0])
+        dst_x.copy_(x)
+        dst_y.copy_(y)
+        return dst_x, dst_y
+    
+    def release(self, stream: torch.cuda.Stream) -> None:
+        """Mark the most recently acquired slot as being read by stream."""
+        event = torch.cuda.Event()
+        event.record(stream)
+        self.events[self._current_slot] = event
+    
+    def close(self) -> None:
+        """Unregister and free NUMA-allocated buffers (invalidates all slots)."""
+        if not self._registered:
+            return
+        
+        torch.cuda.synchronize()
+        self.slots = []
+        for ptr, nbytes in self._registered:
+            torch.cuda.cudart().cudaHostUnregister(ptr)
+            self._libnuma.numa_free(ptr, nbytes)
+        self._registered = []
 
 
 class BenchmarkRunner:
@@ -111,13 +479,62 @@ class BenchmarkRunner:
         batch_size: int = 32,
         pin_memory: bool = True,
         prefetch_factor: int = 2,
+        numa_aware_pin: bool = True,
     ):
         self.num_workers = num_workers
         self.batch_size = batch_size
         self.pin_memory = pin_memory
         self.prefetch_factor = prefetch_factor
-        self.latencies: List[float] = []
+        self.numa_aware_pin = numa_aware_pin
+        self.latencies = np.empty(0, dtype=np.float64)
+        self._progress = ProgressReporter()
+    
+    def _make_pinned_pool(
+        self,
+        num_features: int,
+        feature_dtype: torch.dtype = torch.float32,
+    ) -> Optional[PinnedBufferPool]:
+        """
+        Build the pinned buffer ring used instead of DataLoader pin_memory.
+        
+        Batches are copied into reused pinned buffers rather than freshly
+        pinned ones from the caching host allocator, which rounds sizes up
+        to powers of two and ignores NUMA placement.
+        """
+        if not (self.pin_memory and torch.cuda.is_available()):
+            return None
+        
+        return PinnedBufferPool(
+            num_slots=self.prefetch_factor * (self.num_workers + 1),
+            batch_size=self.batch_size,
+            num_features=num_features,
+            device=torch.cuda.current_device(),
+            numa_aware=self.numa_aware_pin,
+            feature_dtype=feature_dtype,
+        )
+    
+    def _collate_fn(self, pool: Optional[PinnedBufferPool]):
+        """
+        Pick the collate function for a loader.
         
+        Pool buffers live in this process, so workers cannot collate into
+        them; with workers the prefetcher stages batches into the pool.
+        """
+        if pool is not None and self.num_workers == 0:
+            return functools.partial(fast_collate, pool=pool)
+        
+        return fast_collate
+        
+    def _worker_kwargs(self) -> Dict:
+        """DataLoader options that only apply when worker processes are used."""
+        if self.num_workers == 0:
+            return {}
+        
+        return {
+            "prefetch_factor": self.prefetch_factor,
+            "persistent_workers": True,
+        }
+    
     def benchmark_map_style(
         self,
         dataset_path: str,
@@ -130,20 +547,42 @@ class BenchmarkRunner:
         print(f"  Workers: {self.num_workers}")
         print(f"  Batch Size: {self.batch_size}")
         
+        advise_readahead(dataset_path)
         dataset = ParquetDataset(dataset_path)
         print(f"  Dataset Size: {len(dataset):,} samples")
+        print(f"  Feature dtype: {dataset.feature_dtype}")
+        
+        # Workers return whole-batch tensors; pass them via shared memory
+        if self.num_workers > 0:
+            torch.multiprocessing.set_sharing_strategy('file_system')
+        
+        pool = self._make_pinned_pool(dataset.X.shape[1], dataset.feature_dtype)
+        
+        # Without workers, __getitems__ gathers into the pool itself, so
+        # collate only passes the batch through
+        if pool is not None and self.num_workers == 0:
+            dataset.pool = pool
+            collate_fn = fast_collate
+        else:
+            collate_fn = self._collate_fn(pool)
         
         loader = DataLoader(
             dataset,
             batch_size=self.batch_size,
             shuffle=True,
             num_workers=self.num_workers,
-            pin_memory=self.pin_memory,
-            prefetch_factor=self.prefetch_factor if self.num_workers > 0 else None,
-            persistent_workers=self.num_workers > 0,
+            collate_fn=collate_fn,
+            pin_memory=self.pin_memory and pool is None,
+            **self._worker_kwargs(),
         )
         
-        return self._run_benchmark(loader, duration_seconds)
+        try:
+            return self._run_benchmark(
+                loader, duration_seconds, pool=pool, stage=self.num_workers > 0
+            )
+        finally:
+            if pool is not None:
+                pool.close()
     
     def benchmark_iterable_style(
         self,
@@ -155,75 +594,157 @@ class BenchmarkRunner:
         print(f"\n[Iterable-Style Benchmark]")
         print(f"  Dataset: {dataset_path}")
         
-        dataset = ParquetIterableDataset(dataset_path, batch_size=1000)
+        advise_readahead(dataset_path)
+        dataset = ParquetIterableDataset(dataset_path)
+        pool = self._make_pinned_pool(
+            len(dataset.numeric_cols) or 10, dataset.feature_dtype
+        )
         
         loader = DataLoader(
             dataset,
             batch_size=self.batch_size,
             num_workers=self.num_workers,
-            pin_memory=self.pin_memory,
+            collate_fn=self._collate_fn(pool),
+            pin_memory=self.pin_memory and pool is None,
+            **self._worker_kwargs(),
         )
         
-        return self._run_benchmark(loader, duration_seconds)
+        try:
+            return self._run_benchmark(
+                loader, duration_seconds, pool=pool, stage=self.num_workers > 0
+            )
+        finally:
+            if pool is not None:
+                pool.close()
+    
+    def benchmark_arrow_native(
+        self,
+        dataset_path: str,
+        duration_seconds: float = 60.0,
+    ) -> Dict:
+        """
+        Benchmark batching the in-memory dataset without a DataLoader.
+        
+        Shows how much of the DataLoader result is framework overhead
+        rather than data movement.
+        """
+        
+        print(f"\n[Arrow-Native Benchmark]")
+        print(f"  Dataset: {dataset_path}")
+        print(f"  Batch Size: {self.batch_size}")
+        
+        advise_readahead(dataset_path)
+        dataset = ParquetDataset(dataset_path)
+        print(f"  Dataset Size: {len(dataset):,} samples")
+        
+        pool = self._make_pinned_pool(dataset.X.shape[1], dataset.feature_dtype)
+        loader = ArrayBatchLoader(dataset, self.batch_size, pool=pool)
+        
+        try:
+            return self._run_benchmark(loader, duration_seconds, pool=pool)
+        finally:
+            if pool is not None:
+                pool.close()
     
     def _run_benchmark(
         self,
-        loader: DataLoader,
+        loader,
         duration_seconds: float,
+        pool: Optional[PinnedBufferPool] = None,
+        stage: bool = False,
     ) -> Dict:
-        """Core benchmark loop."""
+        """
+        Core benchmark loop.
         
-        self.latencies = []
+        Args:
+            loader: Iterable of (x, y) batches, re-iterated once per epoch
+            duration_seconds: Benchmark duration
+            pool: Pinned buffer pool the batches are copied through on GPU
+            stage: Whether batches still need staging into the pool
+        """
+        
+        # Preallocated latency buffer (ns), grown by doubling when full
+        latencies = np.empty(1 << 20, dtype=np.int64)
+        num_latencies = 0
         total_samples = 0
         total_batches = 0
         
-        start_time = time.perf_counter()
-        end_time = start_time + duration_seconds
+        start_ns = time.monotonic_ns()
+        end_ns = start_ns + int(duration_seconds * 1e9)
         
         # Warmup (3 batches)
         warmup_count = 0
+        batch_is_tuple = True
         for batch in loader:
+            batch_is_tuple = isinstance(batch, (tuple, list))
             warmup_count += 1
             if warmup_count >= 3:
                 break
         
         print(f"  Warmup complete, starting benchmark...")
         
+        # Resolve loop-invariant choices once, outside the timed loop
+        monotonic_ns = time.monotonic_ns
+        use_prefetcher = torch.cuda.is_available()
+        
+        if batch_is_tuple:
+            def batch_len(batch):
+                return batch[0].shape[0]
+        else:
+            fixed_batch_size = self.batch_size
+            
+            def batch_len(batch):
+                return fixed_batch_size
+        
         # Main benchmark loop
+        done = False
         epoch = 0
-        while time.perf_counter() < end_time:
+        while not done and monotonic_ns() < end_ns:
             epoch += 1
             batch_count = 0
             
-            for batch in loader:
-                batch_start = time.perf_counter()
-                
-                if isinstance(batch, (tuple, list)):
-                    x, y = batch
-                    batch_samples = x.shape[0]
-                else:
-                    batch_samples = self.batch_size
-                
-                # Simulate minimal processing (move to device if GPU)
-                if torch.cuda.is_available():
-                    if isinstance(batch, (tuple, list)):
-                        x = x.cuda(non_blocking=True)
-                        y = y.cuda(non_blocking=True)
-                
-                batch_end = time.perf_counter()
-                batch_latency = (batch_end - batch_start) * 1000  # ms
+            # On GPU, batches arrive already resident on the device
+            if use_prefetcher:
+                batches = CudaPrefetcher(
+                    loader, pool=pool, stage=stage
+                )
+            else:
+                batches = loader
+            
+            # Time the fetch itself: loader wait, and on GPU the stream
+            # wait and H2D copy done by the prefetcher's __next__
+            it = iter(batches)
+            while True:
+                t0 = monotonic_ns()
+                try:
+                    batch = next(it)
+                except StopIteration:
+                    break
+                t1 = monotonic_ns()
+                batch_samples = batch_len(batch)
                 
-                self.latencies.append(batch_latency)
+                if num_latencies == latencies.shape[0]:
+                    latencies = np.resize(latencies, 2 * num_latencies)
+                latencies[num_latencies] = t1 - t0
+                num_latencies += 1
                 total_samples += batch_samples
                 total_batches += 1
                 batch_count += 1
                 
-                if time.perf_counter() >= end_time:
+                # Only check the deadline every 64 batches
+                if (num_latencies & 63) == 0 and monotonic_ns() >= end_ns:
+                    done = True
                     break
             
-            print(f"\r  Epoch {epoch}: {batch_count} batches, {total_samples:,} samples total", end="")
+            self._progress(
+                "Epoch {epoch}: {batches} batches, {total_samples:,} samples total",
+                epoch=epoch,
+                batches=batch_count,
+                total_samples=total_samples,
+            )
         
-        actual_duration = time.perf_counter() - start_time
+        actual_duration = (monotonic_ns() - start_ns) / 1e9
+        self.latencies = latencies[:num_latencies].astype(np.float64) * 1e-6  # ms
         
         print(f"\n  Benchmark complete!")
         
@@ -238,25 +759,24 @@ class BenchmarkRunner:
         
         throughput = total_samples / duration
         
-        latencies = self.latencies
-        if not latencies:
-            latencies = [0]
+        latencies = np.asarray(self.latencies, dtype=np.float64)
+        if latencies.size == 0:
+            latencies = np.zeros(1)
         
-        sorted_latencies = sorted(latencies)
-        n = len(sorted_latencies)
+        p50, p95, p99 = latency_percentiles(latencies)
         
         return {
             "throughput": throughput,
             "total_samples": total_samples,
             "duration_seconds": duration,
-            "latency_mean_ms": statistics.mean(latencies),
-            "latency_std_ms": statistics.stdev(latencies) if len(latencies) > 1 else 0,
-            "latency_min_ms": min(latencies),
-            "latency_max_ms": max(latencies),
-            "latency_p50_ms": sorted_latencies[int(n * 0.50)],
-            "latency_p95_ms": sorted_latencies[int(n * 0.95)],
-            "latency_p99_ms": sorted_latencies[int(n * 0.99)] if n >= 100 else sorted_latencies[-1],
-            "num_batches": len(latencies),
+            "latency_mean_ms": float(latencies.mean()),
+            "latency_std_ms": float(latencies.std(ddof=1)) if latencies.size > 1 else 0,
+            "latency_min_ms": float(latencies.min()),
+            "latency_max_ms": float(latencies.max()),
+            "latency_p50_ms": p50,
+            "latency_p95_ms": p95,
+            "latency_p99_ms": p99,
+            "num_batches": int(latencies.size),
             "batch_size": self.batch_size,
             "num_workers": self.num_workers,
         }
@@ -283,6 +803,12 @@ def main():
     parser.add_argument("--workers", type=int, default=4, help="Number of workers")
     parser.add_argument("--batch-size", type=int, default=32, help="Batch size")
     parser.add_argument("--output", help="Output JSON file")
+    parser.add_argument(
+        "--mode",
+        choices=["dataloader", "arrow_native"],
+        default="dataloader",
+        help="Benchmark mode",
+    )
     
     args = parser.parse_args()
     
@@ -302,13 +828,20 @@ def main():
         batch_size=args.batch_size,
     )
     
-    results = runner.benchmark_map_style(
-        dataset_path,
-        duration_seconds=args.duration,
-    )
+    if args.mode == "arrow_native":
+        results = runner.benchmark_arrow_native(
+            dataset_path,
+            duration_seconds=args.duration,
+        )
+    else:
+        results = runner.benchmark_map_style(
+            dataset_path,
+            duration_seconds=args.duration,
+        )
     
     # Add metadata
     results["benchmark"] = "pytorch_dataloader"
+    results["mode"] = args.mode
     results["dataset"] = dataset_path
     results["pytorch_version"] = torch.__version__
     results["cuda_available"] = torch.cuda.is_available()
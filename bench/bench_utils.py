@@ -0,0 +1,77 @@
+"""
+Shared helpers for the Zenith benchmark scripts.
+
+Author: Wahyu Ardiansyah
+"""
+
+import os
+import sys
+import json
+import time
+from typing import Tuple
+
+import numpy as np
+
+# Minimum spacing of progress updates on a terminal and in captured logs
+PROGRESS_INTERVAL_NS = 100_000_000
+LOG_PROGRESS_INTERVAL_NS = 5_000_000_000
+
+
+class ProgressReporter:
+    """
+    Report progress, rate-limited so printing never paces the caller.
+
+    On a terminal the template is redrawn in place at most 10 times a
+    second. Otherwise (e.g. CI logs) the raw fields are written as one
+    JSON line every few seconds, without terminal control characters.
+    Skipped updates are never formatted.
+    """
+
+    def __init__(self):
+        self._is_tty = sys.stdout.isatty()
+        self._last_print_ns = 0
+
+    def __call__(self, template: str, **fields) -> None:
+        now = time.monotonic_ns()
+        interval = PROGRESS_INTERVAL_NS if self._is_tty else LOG_PROGRESS_INTERVAL_NS
+        if now - self._last_print_ns < interval:
+            return
+        self._last_print_ns = now
+
+        if self._is_tty:
+            sys.stdout.write("\r  " + template.format(**fields))
+        else:
+            sys.stdout.write(json.dumps({"progress": fields}) + "\n")
+        sys.stdout.flush()
+
+
+def advise_readahead(path: str) -> None:
+    """
+    Hint the kernel to read a file ahead sequentially (Linux only).
+
+    The advice values are not bit flags, so each one is its own call.
+    """
+    fadvise = getattr(os, 'posix_fadvise', None)
+    if fadvise is None:
+        return
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def latency_percentiles(latencies: np.ndarray) -> Tuple[float, float, float]:
+    """
+    p50, p95 and p99 of a non-empty latency array.
+
+    The order statistics are selected in O(n) instead of sorting. With
+    fewer than 100 samples p99 is not meaningful and falls back to the max.
+    """
+    n = latencies.size
+    p99_idx = int(n * 0.99) if n >= 100 else n - 1
+    idx = np.array([int(n * 0.50), int(n * 0.95), p99_idx])
+    p50, p95, p99 = np.partition(latencies, idx)[idx]
+    return float(p50), float(p95), float(p99)
@@ -11,8 +11,10 @@ import sys
 import json
 import argparse
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, List, Optional, Tuple
 import numpy as np
 
 # Try imports
@@ -23,13 +25,234 @@ except ImportError:
     print("ERROR: pyarrow not installed. Run: pip install pyarrow")
     sys.exit(1)
 
+from bench_utils import ProgressReporter
+
+
+# Codecs the Arrow IPC writer supports
+IPC_CODECS = ("lz4", "zstd")
+
+# Storage types for the numeric feature columns of the Parquet dataset.
+# bfloat16 has no Arrow type, so its raw bits are stored as uint16.
+FEATURE_DTYPES = {
+    "float32": pa.float32(),
+    "bfloat16": pa.uint16(),
+    "uint8": pa.uint8(),
+}
+
+# Fixed uint8 quantization range. Features are standard normal, so +-4
+# sigma covers all but ~6e-5 of values; the rest are clipped.
+QUANT_RANGE = (-4.0, 4.0)
+
+def parse_compression(spec: str) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Parse a compression spec such as "none", "snappy" or "zstd:1".
+    
+    Returns:
+        (codec, level) with codec None for uncompressed output
+    """
+    codec, _, level = spec.lower().partition(":")
+    if codec in ("", "none", "uncompressed"):
+        return None, None
+    
+    return codec, int(level) if level else None
+
+
+def parquet_schema(
+    num_columns: int,
+    include_binary: bool,
+    binary_size: int,
+    feature_dtype: str = "float32",
+) -> pa.Schema:
+    """
+    Schema of the Parquet benchmark dataset.
+    
+    The feature dtype is recorded in the schema metadata. For uint8 the
+    metadata also holds per-column (scale, zero_point), so a reader can
+    dequantize with x.float() * scale + zero_point.
+    """
+    feature_cols = [f"col_{i}" for i in range(num_columns)]
+    fields = [pa.field(col, FEATURE_DTYPES[feature_dtype]) for col in feature_cols]
+    fields += [pa.field("id", pa.int64()), pa.field("label", pa.int32())]
+    
+    if include_binary:
+        fields.append(pa.field("blob", pa.binary(binary_size)))
+    
+    metadata = {"zenith.feature_dtype": feature_dtype}
+    if feature_dtype == "uint8":
+        lo, hi = QUANT_RANGE
+        params = [(hi - lo) / 255.0, lo]
+        metadata["zenith.quantization"] = json.dumps(
+            {col: params for col in feature_cols}
+        )
+    
+    return pa.schema(fields, metadata=metadata)
+
+
+def _encode_features(values: np.ndarray, feature_dtype: str) -> np.ndarray:
+    """Convert float32 features to their storage dtype."""
+    if feature_dtype == "bfloat16":
+        # Keep the upper 16 bits, rounding to nearest even
+        bits = values.view(np.uint32)
+        bits = bits + (0x7FFF + ((bits >> 16) & 1))
+        return (bits >> 16).astype(np.uint16)
+    
+    if feature_dtype == "uint8":
+        lo, hi = QUANT_RANGE
+        codes = np.rint((np.clip(values, lo, hi) - lo) * (255.0 / (hi - lo)))
+        return codes.astype(np.uint8)
+    
+    return values
+
+
+def image_schema(image_size: tuple) -> pa.Schema:
+    """Schema of the image-like benchmark dataset."""
+    flat_size = image_size[0] * image_size[1] * image_size[2]
+    
+    return pa.schema([
+        pa.field("id", pa.int64()),
+        pa.field("image_data", pa.binary(flat_size)),
+        pa.field("label", pa.int32()),
+        pa.field("height", pa.int32()),
+        pa.field("width", pa.int32()),
+        pa.field("channels", pa.int32()),
+    ])
+
+
+def _fixed_size_binary(values: np.ndarray, value_type: pa.DataType, rows: int) -> pa.Array:
+    """Wrap a contiguous uint8 buffer as a fixed-size binary array (zero-copy)."""
+    return pa.FixedSizeBinaryArray.from_buffers(
+        value_type, rows, [None, pa.py_buffer(values)]
+    )
+
+
+def _gen_parquet_batch(
+    seed: np.random.SeedSequence,
+    schema: pa.Schema,
+    rows: int,
+    num_columns: int,
+    include_binary: bool,
+    binary_size: int,
+    row_offset: int,
+    feature_dtype: str = "float32",
+) -> pa.RecordBatch:
+    """Generate one batch of the Parquet benchmark dataset."""
+    rng = np.random.default_rng(seed)
+    
+    # Generate numeric columns
+    arrays = [
+        pa.array(_encode_features(rng.standard_normal(rows, dtype=np.float32), feature_dtype))
+        for _ in range(num_columns)
+    ]
+    
+    # Add ID column
+    arrays.append(pa.array(np.arange(row_offset, row_offset + rows, dtype=np.int64)))
+    
+    # Add label column
+    arrays.append(pa.array(rng.integers(0, 1000, size=rows, dtype=np.int32)))
+    
+    # Add binary blob if requested (one bulk RNG call per batch)
+    if include_binary:
+        blob = rng.integers(0, 256, size=rows * binary_size, dtype=np.uint8)
+        arrays.append(_fixed_size_binary(blob, schema.field("blob").type, rows))
+    
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _gen_image_batch(
+    seed: np.random.SeedSequence,
+    schema: pa.Schema,
+    rows: int,
+    image_size: tuple,
+    row_offset: int,
+) -> pa.RecordBatch:
+    """Generate one batch of the image-like benchmark dataset."""
+    rng = np.random.default_rng(seed)
+    
+    # Generate image-like tensors (flattened)
+    flat_size = image_size[0] * image_size[1] * image_size[2]
+    pixels = rng.integers(0, 256, size=rows * flat_size, dtype=np.uint8)
+    
+    arrays = [
+        pa.array(np.arange(row_offset, row_offset + rows, dtype=np.int64)),
+        _fixed_size_binary(pixels, schema.field("image_data").type, rows),
+        pa.array(rng.integers(0, 1000, size=rows, dtype=np.int32)),
+        pa.array(np.full(rows, image_size[0], dtype=np.int32)),
+        pa.array(np.full(rows, image_size[1], dtype=np.int32)),
+        pa.array(np.full(rows, image_size[2], dtype=np.int32)),
+    ]
+    
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
 
 class DatasetGenerator:
     """Generate synthetic datasets for benchmarking."""
     
-    def __init__(self, output_dir: str = "./bench/data"):
+    def __init__(
+        self,
+        output_dir: str = "./bench/data",
+        compression: str = "none",
+        seed: int = 0,
+        workers: Optional[int] = None,
+        feature_dtype: str = "float32",
+    ):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.compression, self.compression_level = parse_compression(compression)
+        self.workers = workers or os.cpu_count() or 1
+        self.feature_dtype = feature_dtype
+        self._progress = ProgressReporter()
+    
+    def _generate_batches(
+        self,
+        gen_batch: Callable[..., pa.RecordBatch],
+        batch_args: List[tuple],
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Generate batches in a process pool, yielding them in order.
+        
+        Each batch gets its own child seed of self.seed, so output does not
+        depend on the number of workers. At most 2 * workers batches are in
+        flight, while the caller stays the single writer of the output file.
+        """
+        seeds = np.random.SeedSequence(self.seed).spawn(len(batch_args))
+        
+        if self.workers <= 1:
+            for seed, args in zip(seeds, batch_args):
+                yield gen_batch(seed, *args)
+            return
+        
+        max_in_flight = 2 * self.workers
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for seed, args in zip(seeds, batch_args):
+                pending.append(pool.submit(gen_batch, seed, *args))
+                if len(pending) >= max_in_flight:
+                    yield pending.popleft().result()
+            
+            while pending:
+                yield pending.popleft().result()
+    
+    def _parquet_writer(self, output_path: Path, schema: pa.Schema) -> pq.ParquetWriter:
+        """
+        Open a Parquet writer tuned for generation throughput.
+        
+        Random float data compresses poorly, so by default pages are written
+        uncompressed with PLAIN encoding and no statistics, which keeps
+        generation bound by disk bandwidth rather than codec CPU.
+        """
+        return pq.ParquetWriter(
+            output_path,
+            schema,
+            compression=self.compression or "none",
+            compression_level=self.compression_level,
+            use_dictionary=False,
+            write_statistics=False,
+            data_page_size=1 << 20,
+            write_batch_size=16384,
+            version="2.6",
+        )
         
     def generate_parquet_dataset(
         self,
@@ -54,7 +277,7 @@ class DatasetGenerator:
         """
         print(f"\n[Parquet Generator] Creating {name}...")
         print(f"  Rows: {num_rows:,}")
-        print(f"  Columns: {num_columns}")
+        print(f"  Columns: {num_columns} ({self.feature_dtype})")
         
         output_path = self.output_dir / f"{name}.parquet"
         
@@ -62,47 +285,37 @@ class DatasetGenerator:
         batch_size = 100_000
         num_batches = (num_rows + batch_size - 1) // batch_size
         
-        writer = None
+        schema = parquet_schema(num_columns, include_binary, binary_size, self.feature_dtype)
+        batch_args = [
+            (
+                schema,
+                min(batch_size, num_rows - offset),
+                num_columns,
+                include_binary,
+                binary_size,
+                offset,
+                self.feature_dtype,
+            )
+            for offset in range(0, num_rows, batch_size)
+        ]
+        
+        writer = self._parquet_writer(output_path, schema)
         rows_written = 0
         
         start_time = time.time()
         
-        for batch_idx in range(num_batches):
-            current_batch_size = min(batch_size, num_rows - rows_written)
-            
-            # Generate numeric columns
-            data = {
-                f"col_{i}": np.random.randn(current_batch_size).astype(np.float32)
-                for i in range(num_columns)
-            }
-            
-            # Add ID column
-            data["id"] = np.arange(rows_written, rows_written + current_batch_size)
-            
-            # Add label column
-            data["label"] = np.random.randint(0, 1000, current_batch_size)
-            
-            # Add binary blob if requested
-            if include_binary:
-                data["blob"] = [
-                    np.random.bytes(binary_size) 
-                    for _ in range(current_batch_size)
-                ]
-            
-            table = pa.table(data)
+        batches = self._generate_batches(_gen_parquet_batch, batch_args)
+        for batch_idx, batch in enumerate(batches):
+            writer.write_batch(batch)
+            rows_written += batch.num_rows
             
-            if writer is None:
-                writer = pq.ParquetWriter(output_path, table.schema)
-            
-            writer.write_table(table)
-            rows_written += current_batch_size
-            
-            # Progress
-            progress = (batch_idx + 1) / num_batches * 100
-            print(f"\r  Progress: {progress:.1f}% ({rows_written:,} rows)", end="")
+            self._progress(
+                "Progress: {percent:.1f}% ({rows:,} rows)",
+                percent=(batch_idx + 1) / num_batches * 100,
+                rows=rows_written,
+            )
         
-        if writer:
-            writer.close()
+        writer.close()
         
         elapsed = time.time() - start_time
         file_size = output_path.stat().st_size / (1024 * 1024)  # MB
@@ -127,23 +340,26 @@ class DatasetGenerator:
         
         # Generate data
         data = {
-            f"col_{i}": np.random.randn(num_rows).astype(np.float32)
+            f"col_{i}": self.rng.standard_normal(num_rows, dtype=np.float32)
             for i in range(num_columns)
         }
-        data["id"] = np.arange(num_rows)
-        data["label"] = np.random.randint(0, 1000, num_rows)
+        data["id"] = np.arange(num_rows, dtype=np.int64)
+        data["label"] = self.rng.integers(0, 1000, size=num_rows, dtype=np.int32)
         
         table = pa.table(data)
         
         start_time = time.time()
         
-        with pa.ipc.new_file(str(output_path), table.schema) as writer:
-            # Write in batches
-            batch_size = 100_000
-            for i in range(0, num_rows, batch_size):
-                end = min(i + batch_size, num_rows)
-                batch = table.slice(i, end - i)
-                writer.write_batch(batch.to_batches()[0])
+        ipc_compression = None
+        if self.compression in IPC_CODECS:
+            ipc_compression = pa.Codec(
+                self.compression, compression_level=self.compression_level
+            )
+        options = pa.ipc.IpcWriteOptions(compression=ipc_compression, use_threads=True)
+        
+        with pa.ipc.new_file(str(output_path), table.schema, options=options) as writer:
+            # Write in record batches of at most 100k rows
+            writer.write_table(table, max_chunksize=100_000)
         
         elapsed = time.time() - start_time
         file_size = output_path.stat().st_size / (1024 * 1024)
@@ -173,11 +389,11 @@ class DatasetGenerator:
             return None
         
         data = {
-            f"col_{i}": np.random.randn(num_rows).astype(np.float32)
+            f"col_{i}": self.rng.standard_normal(num_rows, dtype=np.float32)
             for i in range(num_columns)
         }
-        data["id"] = np.arange(num_rows)
-        data["label"] = np.random.randint(0, 1000, num_rows)
+        data["id"] = np.arange(num_rows, dtype=np.int64)
+        data["label"] = self.rng.integers(0, 1000, size=num_rows, dtype=np.int32)
         
         df = pd.DataFrame(data)
         
@@ -208,43 +424,26 @@ class DatasetGenerator:
         batch_size = 1000
         num_batches = (num_samples + batch_size - 1) // batch_size
         
-        writer = None
-        samples_written = 0
+        schema = image_schema(image_size)
+        batch_args = [
+            (schema, min(batch_size, num_samples - offset), image_size, offset)
+            for offset in range(0, num_samples, batch_size)
+        ]
+        
+        writer = self._parquet_writer(output_path, schema)
         
         start_time = time.time()
         
-        for batch_idx in range(num_batches):
-            current_batch_size = min(batch_size, num_samples - samples_written)
-            
-            # Generate image-like tensors (flattened)
-            flat_size = image_size[0] * image_size[1] * image_size[2]
-            images = [
-                np.random.randint(0, 256, flat_size, dtype=np.uint8).tobytes()
-                for _ in range(current_batch_size)
-            ]
-            
-            data = {
-                "id": np.arange(samples_written, samples_written + current_batch_size),
-                "image_data": images,
-                "label": np.random.randint(0, 1000, current_batch_size),
-                "height": [image_size[0]] * current_batch_size,
-                "width": [image_size[1]] * current_batch_size,
-                "channels": [image_size[2]] * current_batch_size,
-            }
-            
-            table = pa.table(data)
-            
-            if writer is None:
-                writer = pq.ParquetWriter(output_path, table.schema)
-            
-            writer.write_table(table)
-            samples_written += current_batch_size
+        batches = self._generate_batches(_gen_image_batch, batch_args)
+        for batch_idx, batch in enumerate(batches):
+            writer.write_batch(batch)
             
-            progress = (batch_idx + 1) / num_batches * 100
-            print(f"\r  Progress: {progress:.1f}%", end="")
+            self._progress(
+                "Progress: {percent:.1f}%",
+                percent=(batch_idx + 1) / num_batches * 100,
+            )
         
-        if writer:
-            writer.close()
+        writer.close()
         
         elapsed = time.time() - start_time
         file_size = output_path.stat().st_size / (1024 * 1024)
@@ -358,10 +557,39 @@ def main():
         default="./bench/data",
         help="Output directory (default: ./bench/data)",
     )
+    parser.add_argument(
+        "--compression",
+        default="none",
+        help="Codec as name[:level], e.g. none, snappy, zstd:1 (default: none)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed for reproducible datasets (default: 0)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Generator processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=list(FEATURE_DTYPES),
+        default="float32",
+        help="Storage dtype of Parquet feature columns (default: float32)",
+    )
     
     args = parser.parse_args()
     
-    generator = DatasetGenerator(output_dir=args.output_dir)
+    generator = DatasetGenerator(
+        output_dir=args.output_dir,
+        compression=args.compression,
+        seed=args.seed,
+        workers=args.workers,
+        feature_dtype=args.dtype,
+    )
     generator.generate_all(scale=args.scale)
 
 
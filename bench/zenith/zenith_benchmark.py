@@ -10,12 +10,15 @@ import os
 import sys
 import json
 import time
+import queue
 import argparse
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
-import statistics
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 
-# Add SDK to path
+# Add shared bench helpers and the SDK to path; the SDK goes first so its
+# zenith module is not shadowed by the bench/zenith package
+sys.path.insert(0, str(Path(__file__).parents[1]))
 sdk_path = Path(__file__).parents[2] / "sdk-python"
 sys.path.insert(0, str(sdk_path))
 
@@ -28,6 +31,144 @@ except ImportError:
     print("ERROR: PyArrow not installed")
     sys.exit(1)
 
+from bench_utils import advise_readahead, latency_percentiles
+
+# Optional faster JSON encoder for the results file
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_HAS_TO_TENSOR = hasattr(pa.RecordBatch, "to_tensor")
+
+
+# Binary payload columns that are never converted to numpy
+SKIP_COLUMNS = frozenset({'blob', 'image_data'})
+
+# Batches per timed block; latencies are per-batch means over a block
+TIMING_BLOCK = 64
+
+# Read buffer for streamed Parquet column chunks
+PARQUET_READ_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Tables with at least this many chunks per column are combined up front
+MIN_NUM_CHUNKS_TO_TRIGGER_COMBINE_CHUNKS = 2
+
+
+def _combine_chunks(table: pa.Table) -> pa.Table:
+    """
+    Merge a table's chunks into one contiguous chunk per column.
+    
+    Costs one copy at load time, but keeps per-batch slicing independent
+    of the chunk count and stops batches being cut short at chunk edges.
+    """
+    if table.num_columns > 0 and (
+        table.column(0).num_chunks >= MIN_NUM_CHUNKS_TO_TRIGGER_COMBINE_CHUNKS
+    ):
+        return table.combine_chunks()
+    
+    return table
+
+
+def _to_numpy(array: pa.Array) -> np.ndarray:
+    """
+    Convert an Arrow array to numpy, as a zero-copy view where possible.
+    
+    Falls back to a copying conversion for arrays Arrow cannot expose
+    directly (nulls, booleans, strings, ...).
+    """
+    try:
+        return array.to_numpy(zero_copy_only=True)
+    except pa.ArrowInvalid:
+        return array.to_numpy(zero_copy_only=False)
+
+
+def _dtype_groups(schema: pa.Schema, indexes: List[int]) -> List[List[int]]:
+    """
+    Group column indexes by type, so each group converts as one block.
+    
+    Only numeric columns are grouped; any other column is a group of one.
+    """
+    groups: Dict[pa.DataType, List[int]] = {}
+    singles = []
+    for i in indexes:
+        field_type = schema.field(i).type
+        if pa.types.is_integer(field_type) or pa.types.is_floating(field_type):
+            groups.setdefault(field_type, []).append(i)
+        else:
+            singles.append([i])
+    
+    return list(groups.values()) + singles
+
+
+def _to_matrix(batch: pa.RecordBatch) -> np.ndarray:
+    """
+    Convert same-typed columns to one contiguous (rows, columns) array.
+    
+    Built by Arrow in a single call (RecordBatch.to_tensor, pyarrow 16+)
+    instead of one conversion per column. A single column is returned as a
+    1-D view, and columns with nulls fall back to stacking.
+    """
+    if batch.num_columns == 1:
+        return _to_numpy(batch.column(0))
+    
+    if _HAS_TO_TENSOR:
+        try:
+            return batch.to_tensor(row_major=True).to_numpy()
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # to_tensor rejects nulls with ArrowTypeError
+            pass
+    
+    return np.stack([_to_numpy(column) for column in batch.columns], axis=1)
+
+
+def _prefetch(items: Iterable, depth: int) -> Iterator:
+    """
+    Yield from an iterable that is advanced by a background thread.
+    
+    Up to depth items are produced ahead of the consumer, so work done
+    while producing (Parquet reads and decode, which release the GIL)
+    overlaps with consuming. Producer exceptions are re-raised here, and
+    closing the generator early stops the producer.
+    """
+    done = object()
+    buffer = queue.Queue(maxsize=max(depth, 1))
+    stop = threading.Event()
+    
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as exc:
+            put(exc)
+            return
+        put(done)
+    
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
 
 class ZenithBenchmarkRunner:
     """Run and measure Zenith DataLoader performance."""
@@ -39,7 +180,19 @@ class ZenithBenchmarkRunner:
     ):
         self.num_workers = num_workers
         self.batch_size = batch_size
-        self.latencies: List[float] = []
+        
+        # Per-batch latencies (ms) in a preallocated buffer, grown by doubling
+        self._lat_capacity = 1 << 16
+        self._latencies = np.empty(self._lat_capacity, dtype=np.float64)
+        self._lat_n = 0
+    
+    @property
+    def latencies(self) -> np.ndarray:
+        """Latencies (ms) recorded by the last benchmark."""
+        return self._latencies[:self._lat_n]
+    
+    def _reset_latencies(self) -> None:
+        self._lat_n = 0
         
     def benchmark_zenith_engine(
         self,
@@ -62,62 +215,28 @@ class ZenithBenchmarkRunner:
             print("  Falling back to PyArrow-based loading")
             return self.benchmark_pyarrow_direct(dataset_path, duration_seconds)
         
-        self.latencies = []
-        total_samples = 0
-        total_batches = 0
-        
-        start_time = time.perf_counter()
-        end_time = start_time + duration_seconds
-        
         # Warmup
         print("  Warming up...")
         try:
-            data = zenith.load(dataset_path)
+            data = _combine_chunks(zenith.load(dataset_path))
             print(f"  Loaded {data.num_rows:,} rows")
         except Exception as e:
             print(f"  Zenith load failed: {e}")
             return self.benchmark_pyarrow_direct(dataset_path, duration_seconds)
         
-        print(f"  Starting benchmark...")
-        
-        epoch = 0
-        while time.perf_counter() < end_time:
-            epoch += 1
-            batch_count = 0
-            
-            # Iterate through data in batches
-            num_rows = data.num_rows
-            for i in range(0, num_rows, self.batch_size):
-                batch_start = time.perf_counter()
-                
-                # Slice batch
-                end_idx = min(i + self.batch_size, num_rows)
-                batch = data.slice(i, end_idx - i)
-                
-                # Convert to numpy (simulating tensor creation)
-                for col in batch.column_names:
-                    if col not in ['blob', 'image_data']:
-                        arr = batch.column(col).to_numpy()
-                
-                batch_end = time.perf_counter()
-                batch_latency = (batch_end - batch_start) * 1000  # ms
-                
-                self.latencies.append(batch_latency)
-                total_samples += end_idx - i
-                total_batches += 1
-                batch_count += 1
-                
-                if time.perf_counter() >= end_time:
-                    break
-            
-            print(f"\r  Epoch {epoch}: {batch_count} batches, {total_samples:,} samples total", end="")
-        
-        actual_duration = time.perf_counter() - start_time
-        print(f"\n  Benchmark complete!")
-        
-        results = self._compute_statistics(total_samples, actual_duration)
-        results["epochs"] = epoch
-        results["total_batches"] = total_batches
+        # Same-typed column index groups, each converted as one block
+        non_blob_idx = [
+            i for i, name in enumerate(data.schema.names) if name not in SKIP_COLUMNS
+        ]
+        groups = _dtype_groups(data.schema, non_blob_idx)
+        
+        # Chunk into batches once (zero-copy); every epoch reuses them
+        prebuilt = data.to_batches(max_chunksize=self.batch_size)
+        results = self._run_loop(
+            lambda: prebuilt,
+            duration_seconds,
+            groups,
+        )
         results["loader"] = "zenith_engine"
         
         return results
@@ -133,56 +252,29 @@ class ZenithBenchmarkRunner:
         print(f"  Dataset: {dataset_path}")
         print(f"  Batch Size: {self.batch_size}")
         
-        self.latencies = []
-        total_samples = 0
-        total_batches = 0
+        advise_readahead(dataset_path)
         
-        # Read table once
-        table = pq.read_table(dataset_path)
+        # Read table once, from a memory map so file pages come straight
+        # from the page cache rather than a private read buffer
+        source = pa.memory_map(dataset_path, 'r')
+        table = _combine_chunks(pq.read_table(source))
         num_rows = table.num_rows
         print(f"  Dataset Size: {num_rows:,} rows")
         
-        start_time = time.perf_counter()
-        end_time = start_time + duration_seconds
-        
-        print(f"  Starting benchmark...")
-        
-        epoch = 0
-        while time.perf_counter() < end_time:
-            epoch += 1
-            batch_count = 0
-            
-            for i in range(0, num_rows, self.batch_size):
-                batch_start = time.perf_counter()
-                
-                # Slice batch (zero-copy in Arrow!)
-                end_idx = min(i + self.batch_size, num_rows)
-                batch = table.slice(i, end_idx - i)
-                
-                # Convert to numpy arrays (simulating tensor creation)
-                for col in batch.column_names:
-                    if col not in ['blob', 'image_data']:
-                        arr = batch.column(col).to_numpy()
-                
-                batch_end = time.perf_counter()
-                batch_latency = (batch_end - batch_start) * 1000  # ms
-                
-                self.latencies.append(batch_latency)
-                total_samples += end_idx - i
-                total_batches += 1
-                batch_count += 1
-                
-                if time.perf_counter() >= end_time:
-                    break
-            
-            print(f"\r  Epoch {epoch}: {batch_count} batches, {total_samples:,} samples total", end="")
-        
-        actual_duration = time.perf_counter() - start_time
-        print(f"\n  Benchmark complete!")
-        
-        results = self._compute_statistics(total_samples, actual_duration)
-        results["epochs"] = epoch
-        results["total_batches"] = total_batches
+        # Same-typed column index groups, each converted as one block
+        non_blob_idx = [
+            i for i, name in enumerate(table.schema.names) if name not in SKIP_COLUMNS
+        ]
+        groups = _dtype_groups(table.schema, non_blob_idx)
+        
+        # Chunk into record batches once (zero-copy in Arrow!); the table
+        # never changes, so every epoch reuses them
+        prebuilt = table.to_batches(max_chunksize=self.batch_size)
+        results = self._run_loop(
+            lambda: prebuilt,
+            duration_seconds,
+            groups,
+        )
         results["loader"] = "pyarrow_direct"
         
         return results
@@ -198,83 +290,157 @@ class ZenithBenchmarkRunner:
         print(f"  Dataset: {dataset_path}")
         print(f"  Batch Size: {self.batch_size}")
         
-        self.latencies = []
+        advise_readahead(dataset_path)
+        
+        # Coalesce column chunk reads per row group and buffer page reads
+        pf = pq.ParquetFile(
+            dataset_path, pre_buffer=True, buffer_size=PARQUET_READ_BUFFER_SIZE
+        )
+        print(f"  Dataset Rows: {pf.metadata.num_rows:,}")
+        
+        # Skip decoding binary payload columns the benchmark never converts
+        non_blob_cols = [c for c in pf.schema_arrow.names if c not in SKIP_COLUMNS]
+        
+        def epoch_batches():
+            # Read and decode ahead on a background thread
+            batches = pf.iter_batches(
+                batch_size=self.batch_size, columns=non_blob_cols, use_threads=True
+            )
+            return _prefetch(batches, 2 * self.num_workers)
+        
+        # Batches are already projected by the reader, and need no
+        # combine_chunks(): a RecordBatch column is one contiguous array, and
+        # iter_batches re-batches across row groups, so only the last batch
+        # of an epoch is short. Group indexes refer to the projected columns.
+        projected = pa.schema([pf.schema_arrow.field(c) for c in non_blob_cols])
+        groups = _dtype_groups(projected, list(range(len(non_blob_cols))))
+        results = self._run_loop(epoch_batches, duration_seconds, groups)
+        results["loader"] = "batch_iterator"
+        
+        return results
+    
+    def _run_loop(
+        self,
+        epoch_batches: Callable[[], Iterable[pa.RecordBatch]],
+        duration_seconds: float,
+        groups: List[List[int]],
+    ) -> Dict:
+        """
+        Core benchmark loop shared by all loaders.
+        
+        Args:
+            epoch_batches: Returns a fresh iterable of batches for each epoch
+            duration_seconds: Benchmark duration
+            groups: Column index groups, each converted to one array
+        """
+        self._reset_latencies()
         total_samples = 0
         total_batches = 0
         
-        pf = pq.ParquetFile(dataset_path)
-        print(f"  Dataset Rows: {pf.metadata.num_rows:,}")
+        # Bind hot-loop lookups to locals once
+        perf_counter = time.perf_counter
+        to_matrix = _to_matrix
+        record_block = self._record_block
         
-        start_time = time.perf_counter()
+        start_time = perf_counter()
         end_time = start_time + duration_seconds
         
         print(f"  Starting benchmark...")
         
+        done = False
         epoch = 0
-        while time.perf_counter() < end_time:
+        while not done and perf_counter() < end_time:
             epoch += 1
             batch_count = 0
             
-            for batch in pf.iter_batches(batch_size=self.batch_size):
-                batch_start = time.perf_counter()
-                
-                # Process batch
-                for col in batch.schema.names:
-                    if col not in ['blob', 'image_data']:
-                        arr = batch.column(col).to_numpy()
-                
-                batch_end = time.perf_counter()
-                batch_latency = (batch_end - batch_start) * 1000
+            block_start = perf_counter()
+            block_batches = 0
+            
+            for batch in epoch_batches():
+                # Convert to numpy arrays (simulating tensor creation)
+                for group in groups:
+                    arr = to_matrix(batch.select(group))
                 
-                self.latencies.append(batch_latency)
                 total_samples += batch.num_rows
-                total_batches += 1
                 batch_count += 1
+                block_batches += 1
                 
-                if time.perf_counter() >= end_time:
-                    break
+                # Time (and check the deadline) once per block of batches
+                if block_batches == TIMING_BLOCK:
+                    now = perf_counter()
+                    record_block(now - block_start, block_batches)
+                    block_start = now
+                    block_batches = 0
+                    if now >= end_time:
+                        done = True
+                        break
+            
+            if block_batches:
+                record_block(perf_counter() - block_start, block_batches)
             
+            total_batches += batch_count
             print(f"\r  Epoch {epoch}: {batch_count} batches, {total_samples:,} samples total", end="")
         
-        actual_duration = time.perf_counter() - start_time
+        actual_duration = perf_counter() - start_time
         print(f"\n  Benchmark complete!")
         
         results = self._compute_statistics(total_samples, actual_duration)
         results["epochs"] = epoch
         results["total_batches"] = total_batches
-        results["loader"] = "batch_iterator"
         
         return results
     
+    def _record_block(self, elapsed: float, num_batches: int) -> None:
+        """Record a timed block as num_batches samples of its mean latency (ms)."""
+        end = self._lat_n + num_batches
+        if end > self._lat_capacity:
+            while end > self._lat_capacity:
+                self._lat_capacity *= 2
+            self._latencies = np.resize(self._latencies, self._lat_capacity)
+        
+        self._latencies[self._lat_n:end] = elapsed * 1000 / num_batches
+        self._lat_n = end
+    
     def _compute_statistics(self, total_samples: int, duration: float) -> Dict:
         """Compute benchmark statistics."""
         
         throughput = total_samples / duration
         
         latencies = self.latencies
-        if not latencies:
-            latencies = [0]
+        if latencies.size == 0:
+            latencies = np.zeros(1)
         
-        sorted_latencies = sorted(latencies)
-        n = len(sorted_latencies)
+        p50, p95, p99 = latency_percentiles(latencies)
         
         return {
             "throughput": throughput,
             "total_samples": total_samples,
             "duration_seconds": duration,
-            "latency_mean_ms": statistics.mean(latencies),
-            "latency_std_ms": statistics.stdev(latencies) if len(latencies) > 1 else 0,
-            "latency_min_ms": min(latencies),
-            "latency_max_ms": max(latencies),
-            "latency_p50_ms": sorted_latencies[int(n * 0.50)],
-            "latency_p95_ms": sorted_latencies[int(n * 0.95)],
-            "latency_p99_ms": sorted_latencies[int(n * 0.99)] if n >= 100 else sorted_latencies[-1],
-            "num_batches": len(latencies),
+            "latency_mean_ms": float(latencies.mean()),
+            "latency_std_ms": float(latencies.std(ddof=1)) if latencies.size > 1 else 0,
+            "latency_min_ms": float(latencies.min()),
+            "latency_max_ms": float(latencies.max()),
+            "latency_p50_ms": p50,
+            "latency_p95_ms": p95,
+            "latency_p99_ms": p99,
+            "num_batches": int(latencies.size),
             "batch_size": self.batch_size,
             "num_workers": self.num_workers,
         }
 
 
+def write_results(path: str, data: Dict) -> None:
+    """Write results as indented JSON, encoded by orjson when installed."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=option))
+        return
+    
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
 def find_dataset(data_dir: str) -> Optional[str]:
     """Find a parquet dataset in the data directory."""
     data_path = Path(data_dir)
@@ -374,8 +540,7 @@ def main():
     
     # Save results
     if args.output:
-        with open(args.output, "w") as f:
-            json.dump(output_data, f, indent=2)
+        write_results(args.output, output_data)
         print(f"\nResults saved to: {args.output}")
     
     return output_data
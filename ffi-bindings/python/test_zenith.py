@@ -37,6 +37,16 @@ class TestZenithClient(unittest.TestCase):
         client.close()
         client.close()  # Should not raise
     
+    def test_failed_init_cleanup(self):
+        """Test a client whose init failed can still be cleaned up"""
+        client = ZenithClient.__new__(ZenithClient)
+        with self.assertRaises(OSError):
+            client.__init__(lib_path="/nonexistent/libzenith_core.so")
+        
+        self.assertTrue(client._closed)
+        client.close()  # Should not raise
+        client.__del__()  # Should not raise
+    
     def test_operations_after_close(self):
         """Test operations fail after close"""
         client = ZenithClient()
@@ -4,6 +4,7 @@ High-performance data plane client for Python
 """
 import ctypes
 import os
+import struct
 from typing import Optional, Dict, Any
 from pathlib import Path
 
@@ -43,6 +44,56 @@ class _CStats(ctypes.Structure):
     ]
 
 
+# Native-layout view of _CStats, to unpack all fields in one call
+_STATS_FMT = struct.Struct("@NNQ")
+assert _STATS_FMT.size == ctypes.sizeof(_CStats)
+
+
+class _CArrowArrayStream(ctypes.Structure):
+    """struct ArrowArrayStream from the Arrow C stream interface"""
+    _fields_ = [
+        ("get_schema", ctypes.c_void_p),
+        ("get_next", ctypes.c_void_p),
+        ("get_last_error", ctypes.c_void_p),
+        ("release", ctypes.c_void_p),
+        ("private_data", ctypes.c_void_p),
+    ]
+
+
+def _setup_functions(lib: ctypes.CDLL) -> None:
+    """Setup C function signatures (once per library handle)"""
+    # zenith_init
+    lib.zenith_init.argtypes = [ctypes.c_uint32]
+    lib.zenith_init.restype = ctypes.c_void_p
+    
+    # zenith_free
+    lib.zenith_free.argtypes = [ctypes.c_void_p]
+    lib.zenith_free.restype = None
+    
+    # zenith_load_plugin
+    lib.zenith_load_plugin.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_uint8),
+        ctypes.c_size_t
+    ]
+    lib.zenith_load_plugin.restype = ctypes.c_int32
+    
+    # zenith_get_stats
+    lib.zenith_get_stats.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(_CStats)
+    ]
+    lib.zenith_get_stats.restype = ctypes.c_int32
+    
+    # zenith_export_stream (optional, not exported by older cores)
+    if hasattr(lib, "zenith_export_stream"):
+        lib.zenith_export_stream.argtypes = [
+            ctypes.c_void_p,
+            ctypes.POINTER(_CArrowArrayStream)
+        ]
+        lib.zenith_export_stream.restype = ctypes.c_int32
+
+
 class ZenithClient:
     """
     Zenith Data Plane Client
@@ -54,6 +105,19 @@ class ZenithClient:
         ...     print(f"Loaded {stats.plugin_count} plugins")
     """
     
+    # Loaded core libraries, shared by all clients, keyed by path
+    _libs: Dict[str, ctypes.CDLL] = {}
+    
+    @classmethod
+    def _get_lib(cls, lib_path: str) -> ctypes.CDLL:
+        """Load and set up a core library, or return the cached handle"""
+        lib = cls._libs.get(lib_path)
+        if lib is None:
+            lib = ctypes.CDLL(lib_path)
+            _setup_functions(lib)
+            cls._libs[lib_path] = lib
+        return lib
+    
     def __init__(self, buffer_size: int = 1024, lib_path: Optional[str] = None):
         """
         Initialize Zenith client
@@ -62,13 +126,16 @@ class ZenithClient:
             buffer_size: Ring buffer size
             lib_path: Path to libzenith_core.so (auto-detected if None)
         """
+        # Start out closed, so cleanup is safe if anything below raises
+        self._closed = True
+        self._engine_ptr = None
+        
         if lib_path is None:
             # Auto-detect library path
             base_path = Path(__file__).parent.parent.parent / "core" / "target" / "release"
             lib_path = str(base_path / "libzenith_core.so")
         
-        self._lib = ctypes.CDLL(lib_path)
-        self._setup_functions()
+        self._lib = self._get_lib(lib_path)
         
         self._engine_ptr = self._lib.zenith_init(ctypes.c_uint32(buffer_size))
         if not self._engine_ptr:
@@ -76,31 +143,6 @@ class ZenithClient:
         
         self._closed = False
     
-    def _setup_functions(self):
-        """Setup C function signatures"""
-        # zenith_init
-        self._lib.zenith_init.argtypes = [ctypes.c_uint32]
-        self._lib.zenith_init.restype = ctypes.c_void_p
-        
-        # zenith_free
-        self._lib.zenith_free.argtypes = [ctypes.c_void_p]
-        self._lib.zenith_free.restype = None
-        
-        # zenith_load_plugin
-        self._lib.zenith_load_plugin.argtypes = [
-            ctypes.c_void_p,
-            ctypes.POINTER(ctypes.c_uint8),
-            ctypes.c_size_t
-        ]
-        self._lib.zenith_load_plugin.restype = ctypes.c_int32
-        
-        # zenith_get_stats
-        self._lib.zenith_get_stats.argtypes = [
-            ctypes.c_void_p,
-            ctypes.POINTER(_CStats)
-        ]
-        self._lib.zenith_get_stats.restype = ctypes.c_int32
-    
     def load_plugin(self, wasm_path: str) -> None:
         """
         Load a WASM plugin
@@ -120,7 +162,9 @@ class ZenithClient:
         if not wasm_bytes:
             raise ValueError("Empty WASM file")
         
-        c_bytes = (ctypes.c_uint8 * len(wasm_bytes)).from_buffer_copy(wasm_bytes)
+        # Pass a pointer into the bytes object itself rather than copying
+        # it into a ctypes array; wasm_bytes outlives the call
+        c_bytes = ctypes.cast(ctypes.c_char_p(wasm_bytes), ctypes.POINTER(ctypes.c_uint8))
         ret = self._lib.zenith_load_plugin(
             self._engine_ptr,
             c_bytes,
@@ -146,17 +190,45 @@ class ZenithClient:
         if ret != 0:
             raise ZenithError(ret, "Failed to get stats")
         
-        return Stats(
-            buffer_len=c_stats.buffer_len,
-            plugin_count=c_stats.plugin_count,
-            events_processed=c_stats.events_processed
-        )
+        return Stats(*_STATS_FMT.unpack_from(c_stats))
+    
+    def get_record_batch_reader(self):
+        """
+        Read buffered events as a stream of Arrow record batches
+        
+        Batches cross the FFI boundary through the Arrow C stream
+        interface, so their buffers are shared with the core, not copied.
+        Requires pyarrow.
+        
+        Returns:
+            pyarrow.RecordBatchReader over the exported stream
+            
+        Raises:
+            ZenithError: If the core does not support or fails the export
+        """
+        if self._closed:
+            raise ZenithError(-1, "Client is closed")
+        
+        if not hasattr(self._lib, "zenith_export_stream"):
+            raise ZenithError(-4, "Core library does not export zenith_export_stream")
+        
+        import pyarrow as pa
+        
+        stream = _CArrowArrayStream()
+        ret = self._lib.zenith_export_stream(self._engine_ptr, ctypes.byref(stream))
+        
+        if ret != 0:
+            raise ZenithError(ret, "Failed to export record batch stream")
+        
+        # Moves the stream into the reader, which takes over releasing it
+        return pa.RecordBatchReader._import_from_c(ctypes.addressof(stream))
     
     def close(self) -> None:
         """Free engine resources"""
         if not self._closed:
-            self._lib.zenith_free(self._engine_ptr)
             self._closed = True
+            self._lib.zenith_free(self._engine_ptr)
+            self._engine_ptr = None
     
     def __enter__(self):
         return self
@@ -165,7 +237,13 @@ class ZenithClient:
         self.close()
     
     def __del__(self):
-        self.close()
+        # May run on a partially initialized client or at interpreter shutdown
+        if getattr(self, '_closed', True):
+            return
+        try:
+            self.close()
+        except Exception:
+            pass
 
 
 __all__ = ['ZenithClient', 'ZenithError', 'Stats']
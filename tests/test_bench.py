@@ -0,0 +1,45 @@
+"""
+Unit tests for the benchmark helpers
+Run without a built core library
+"""
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../bench/zenith'))
+
+import numpy as np
+import pyarrow as pa
+
+from zenith_benchmark import _to_matrix
+
+
+class TestToMatrix(unittest.TestCase):
+    """Column block conversion in zenith_benchmark"""
+
+    def test_same_typed_columns(self):
+        """Test columns are stacked row-major"""
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array([1.0, 2.0], pa.float32()), pa.array([3.0, 4.0], pa.float32())],
+            names=['a', 'b'],
+        )
+        matrix = _to_matrix(batch)
+
+        self.assertEqual(matrix.shape, (2, 2))
+        np.testing.assert_array_equal(matrix, [[1.0, 3.0], [2.0, 4.0]])
+
+    def test_nullable_column(self):
+        """Test a column with nulls falls back to stacking, nulls as NaN"""
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array([1.0, None], pa.float32()), pa.array([3.0, 4.0], pa.float32())],
+            names=['a', 'b'],
+        )
+        matrix = _to_matrix(batch)
+
+        self.assertEqual(matrix.shape, (2, 2))
+        self.assertEqual(matrix[0, 0], 1.0)
+        self.assertTrue(np.isnan(matrix[1, 0]))
+        np.testing.assert_array_equal(matrix[:, 1], [3.0, 4.0])
+
+
+if __name__ == '__main__':
+    unittest.main()